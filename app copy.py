@@ -14,6 +14,7 @@ import queue
 import base64
 import json
 import os
+import atexit
 import numpy as np
 
 MODEL_PATH = "best.pt"
@@ -95,16 +96,13 @@ def point_in_polygon(point, polygon):
 
 
 def pulse_relay():
-    """Pulse relay using GPIO-reset method"""
+    """Pulse relay using GPIO (pin is set up once at startup)"""
     print("Relay: ON (LOW)")
-    GPIO.setmode(GPIO.BCM)
-    GPIO.setup(RELAY_PIN, GPIO.OUT)
     GPIO.output(RELAY_PIN, GPIO.LOW)  # Relay ON (active LOW)
     time.sleep(PULSE_DURATION)
 
     print("Relay: OFF (HIGH)")
     GPIO.output(RELAY_PIN, GPIO.HIGH)  # Relay OFF
-    GPIO.cleanup()  # Reset GPIO completely
 
 
 def detection_loop():
@@ -887,6 +885,11 @@ def status():
 
 
 if __name__ == '__main__':
+    # Initialize GPIO once instead of on every trigger
+    GPIO.setmode(GPIO.BCM)
+    GPIO.setup(RELAY_PIN, GPIO.OUT, initial=GPIO.HIGH)  # Start with relay OFF
+    atexit.register(GPIO.cleanup)
+    
     # Load saved polygon on startup
     load_polygon()
     
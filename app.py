@@ -3,54 +3,137 @@ Flask Web Application for Cat Detection with Relay Control
 Access via browser at http://<raspberry-pi-ip>:5000
 """
 
+# Make sockets and sleeps cooperative for the gevent server before anything
+# else imports them; threads stay native so detection runs alongside requests
+from gevent import monkey
+monkey.patch_all(thread=False)
+
+import atexit
+import os
+
+# Cap OpenMP workers before torch is imported so inference leaves a core free
+os.environ.setdefault("OMP_NUM_THREADS", "3")
+
 from ultralytics import YOLO
 import cv2
 import time
 import RPi.GPIO as GPIO
 from datetime import datetime
-from flask import Flask, Response, render_template_string, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask_sock import Sock
+import gevent
+from gevent.event import Event as GreenEvent
+from gevent.pywsgi import WSGIServer
 import threading
-import queue
 import base64
+import gzip
 import json
-import os
+import zlib
 import numpy as np
+import torch
+from numba import njit
 from picamera2 import Picamera2
 
-MODEL_PATH = "best.pt"
+# Prefer an INT8 model exported by export_model.py over the PyTorch checkpoint
+MODEL_CANDIDATES = ["best.engine", "best_int8.onnx", "best.pt"]
+MODEL_PATH = next((p for p in MODEL_CANDIDATES if os.path.exists(p)), "best.pt")
 CONFIDENCE_THRESHOLD = 0.30
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
+CAMERA_FPS = 30  # Sensor frame rate; capture blocks until the next frame, pacing the loop
+INFERENCE_SIZE = 320  # YOLO input size; boxes come back in full frame coordinates
+LORES_SIZE = (320, 240)  # ISP-scaled YUV420 stream used for motion checks
+GRAYSCALE_INFERENCE = False  # Run YOLO on the lores luma plane; needs a grayscale-trained model
+MOTION_SIZE = (80, 60)  # Frame size used for the inter-frame motion check
+MOTION_PIXEL_DELTA = 15  # Gray level change for a pixel to count as moving
+MOTION_MIN_PIXELS = 10  # Moving pixels needed to run inference again
+MAX_INFERENCE_INTERVAL = 1.0  # Run inference at least this often (seconds)
 RELAY_PIN = 18
 PULSE_DURATION = 0.5
 COOLDOWN = 2  # Trigger once every 2 seconds max
+STREAM_JPEG_QUALITY = 75
+STREAM_SIZE = (FRAME_WIDTH, FRAME_HEIGHT)  # Streamed frame size; smaller saves bandwidth and client scaling
+SNAPSHOT_JPEG_QUALITY = 90
+EVENTS_KEEPALIVE = 15  # Seconds between keepalive comments on /events
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+INDEX_CACHE_CONTROL = "public, max-age=3600"
+TORCH_THREADS = 3
+OPENCV_THREADS = 2
+DETECTION_CPUS = {1, 2, 3}  # Leave core 0 for the camera and Flask
+
+cv2.setNumThreads(OPENCV_THREADS)
+torch.set_num_threads(TORCH_THREADS)
+
+# libjpeg-turbo (NEON SIMD on the Pi) is much faster than OpenCV's encoder
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+    jpeg_encoder = TurboJPEG()
+except Exception as e:
+    jpeg_encoder = None
+    print(f"Warning: TurboJPEG unavailable, using OpenCV JPEG encoder: {e}")
+
+# orjson serializes straight to bytes and is much faster than the json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    print("Warning: orjson unavailable, using json for status updates")
 
 # Global variables for sharing between threads
-frame_queue = queue.Queue(maxsize=2)
-snapshot_frame = None
-snapshot_lock = threading.Lock()
+latest_frame = None  # Newest annotated frame waiting to be encoded
+frame_cond = threading.Condition()
+# Shared state below is published by swapping in new objects, never mutated in
+# place, so readers can use a plain reference without taking a lock
+latest_jpeg = None  # Latest encoded JPEG shared by all viewers
+latest_part = None  # latest_jpeg wrapped as a multipart part for /video_feed
+snapshot_jpeg = None  # Frame captured when drawing starts, encoded once
 detection_status = {"detected": False, "last_trigger": None, "count": 0}
-status_lock = threading.Lock()
+status_payload = None  # (ETag, JSON bytes) for detection_status, built once per change
+# Stream greenlets wait on these; each is set and replaced when new data is published
+viewer_signals = {"frame": GreenEvent(), "status": GreenEvent()}
+server_hub = None  # gevent hub running the web server, set in __main__
 last_trigger_time = 0
-polygon_points = []  # Store polygon coordinates
-polygon_lock = threading.Lock()
+relay_event = threading.Event()  # Set by the detection loop to request a relay pulse
+# (version, points, points as (n, 2) int32 array or None, bbox or None)
+# bbox is (x_min, y_min, x_max, y_max) and doubles as the "polygon active" flag:
+# it is only set for polygons with 3+ points, anything less filters nothing
+polygon_state = (0, [], None, None)
+polygon_lock = threading.Lock()  # Serializes writers only
 drawing_mode = False  # Flag to pause video during drawing
-drawing_lock = threading.Lock()
 POLYGON_SAVE_FILE = "polygon_coordinates.json"
+# Polygon fill mask cropped to its bounding box, rebuilt when the polygon changes
+overlay_cache = {"key": None, "bbox": None, "mask": None, "tint": None}
+
+def green_thread(target):
+    """Thread factory for WebSocket readers, so they run as greenlets too"""
+    return gevent.Greenlet(target)
+
 
 app = Flask(__name__)
+app.config['SOCK_SERVER_OPTIONS'] = {'thread_class': green_thread, 'event_class': GreenEvent}
+sock = Sock(app)
+
+
+def set_polygon(points):
+    """Replace polygon coordinates and rebuild the array used by the detection loop"""
+    global polygon_state
+    points_np = np.array(points, np.int32).reshape(-1, 2) if points else None
+    bbox = None
+    if points_np is not None and len(points_np) >= 3:
+        bbox = tuple(points_np.min(0).tolist() + points_np.max(0).tolist())
+    with polygon_lock:
+        polygon_state = (polygon_state[0] + 1, points, points_np, bbox)
 
 
 def load_polygon():
     """Load polygon coordinates from file"""
-    global polygon_points
     if os.path.exists(POLYGON_SAVE_FILE):
         try:
             with open(POLYGON_SAVE_FILE, 'r') as f:
                 data = json.load(f)
-                with polygon_lock:
-                    polygon_points = data.get('points', [])
-                print(f"Loaded polygon with {len(polygon_points)} points")
+                points = data.get('points', [])
+                set_polygon(points)
+                print(f"Loaded polygon with {len(points)} points")
                 return True
         except Exception as e:
             print(f"Error loading polygon: {e}")
@@ -60,8 +143,7 @@ def load_polygon():
 def save_polygon():
     """Save polygon coordinates to file"""
     try:
-        with polygon_lock:
-            points = polygon_points.copy()
+        points = polygon_state[1]
         with open(POLYGON_SAVE_FILE, 'w') as f:
             json.dump({'points': points}, f)
         print(f"Saved polygon with {len(points)} points")
@@ -71,28 +153,88 @@ def save_polygon():
         return False
 
 
-def point_in_polygon(point, polygon):
-    """Check if a point is inside a polygon using ray casting algorithm"""
-    if len(polygon) < 3:
-        return True  # No polygon defined, allow all detections
-    
-    x, y = point
-    n = len(polygon)
-    inside = False
-    
-    p1x, p1y = polygon[0]
-    for i in range(1, n + 1):
-        p2x, p2y = polygon[i % n]
-        if y > min(p1y, p2y):
-            if y <= max(p1y, p2y):
-                if x <= max(p1x, p2x):
-                    if p1y != p2y:
-                        xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                    if p1x == p2x or x <= xinters:
+@njit(cache=True, fastmath=True)
+def pip_batch(points, poly):
+    """Check which points are inside a polygon using ray casting algorithm
+
+    points is an (N, 2) array of x, y coordinates and poly an (M, 2) array of
+    polygon vertices. Returns an (N,) boolean mask.
+    """
+    n_points = points.shape[0]
+    n = poly.shape[0]
+    mask = np.zeros(n_points, dtype=np.bool_)
+    if n < 3:
+        mask[:] = True  # No polygon defined, allow all detections
+        return mask
+
+    for k in range(n_points):
+        x = points[k, 0]
+        y = points[k, 1]
+        inside = False
+
+        p1x = poly[0, 0]
+        p1y = poly[0, 1]
+        for i in range(1, n + 1):
+            p2x = poly[i % n, 0]
+            p2y = poly[i % n, 1]
+            if y > min(p1y, p2y) and y <= max(p1y, p2y) and x <= max(p1x, p2x):
+                if p1x == p2x:
+                    inside = not inside
+                else:
+                    xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+                    if x <= xinters:
                         inside = not inside
-        p1x, p1y = p2x, p2y
-    
-    return inside
+            p1x = p2x
+            p1y = p2y
+
+        mask[k] = inside
+
+    return mask
+
+
+def draw_polygon_overlay(image, pts, version):
+    """Draw polygon outline and a semi-transparent fill onto image in place"""
+    key = (version, image.shape)
+    if overlay_cache["key"] != key:
+        mask = np.zeros(image.shape[:2], np.uint8)
+        cv2.fillPoly(mask, [pts], 255)
+        ys, xs = np.nonzero(mask)
+        if len(ys) > 0:
+            bbox = (slice(ys.min(), ys.max() + 1), slice(xs.min(), xs.max() + 1))
+            tint = np.empty(image[bbox].shape, np.uint8)
+            tint[:] = (0, 255, 0)
+            overlay_cache.update(bbox=bbox, mask=(mask[bbox] > 0)[:, :, None], tint=tint)
+        else:
+            overlay_cache.update(bbox=None, mask=None, tint=None)
+        overlay_cache["key"] = key
+
+    cv2.polylines(image, [pts], True, (0, 255, 0), 2)
+
+    # Blend only the pixels inside the polygon's bounding box
+    bbox = overlay_cache["bbox"]
+    if bbox is not None:
+        roi = image[bbox]
+        blended = cv2.addWeighted(overlay_cache["tint"], 0.3, roi, 0.7, 0)
+        np.copyto(roi, blended, where=overlay_cache["mask"])
+
+
+def draw_detections(image, xyxy, conf, cls, names):
+    """Draw detection boxes with class and confidence labels onto image in place"""
+    for (x1, y1, x2, y2), score, c in zip(xyxy.astype(np.int32).tolist(), conf.tolist(), cls.tolist()):
+        cv2.rectangle(image, (x1, y1), (x2, y2), (0, 0, 255), 2)
+        cv2.putText(image, f"{names[int(c)]} {score:.2f}", (x1, max(y1 - 4, 12)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+
+
+def encode_jpeg(frame, quality):
+    """Encode a BGR frame as JPEG bytes, returns None on failure"""
+    if jpeg_encoder is not None:
+        return jpeg_encoder.encode(frame, quality=quality, pixel_format=TJPF_BGR,
+                                   jpeg_subsample=TJSAMP_420)
+    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality,
+                                               cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+                                               cv2.IMWRITE_JPEG_PROGRESSIVE, 0])
+    return buffer.tobytes() if ret else None
 
 
 def pulse_relay():
@@ -108,18 +250,55 @@ def pulse_relay():
         print(f"Error pulsing relay: {e}")
 
 
+def relay_loop():
+    """Pulse the relay on request so the detection loop never waits on it"""
+    while True:
+        relay_event.wait()
+        relay_event.clear()
+        pulse_relay()
+
+
+def cleanup_gpio():
+    """Release GPIO pins on exit"""
+    GPIO.cleanup()
+    print("GPIO cleaned up")
+
+
 def detection_loop():
     """Main detection loop running in background thread"""
-    global last_trigger_time, detection_status, snapshot_frame
+    global last_trigger_time, snapshot_jpeg
 
-    model = YOLO(MODEL_PATH)
+    # Pin this thread (and the inference workers it spawns) off core 0
+    try:
+        cpus = DETECTION_CPUS & os.sched_getaffinity(0)
+        if cpus:
+            os.sched_setaffinity(0, cpus)
+    except (AttributeError, OSError) as e:
+        print(f"Warning: could not set CPU affinity: {e}")
+
+    model = YOLO(MODEL_PATH, task="detect")
+    print(f"Loaded model: {MODEL_PATH}")
+    # Compile the polygon test now rather than stalling the first relay trigger;
+    # argument types match the loop (float32 box centers, int32 polygon)
+    pip_batch(np.zeros((1, 2), np.float32), np.zeros((3, 2), np.int32))
+    prev_gray_small = None
+    prev_boxes = None  # Detections from the last frame that ran inference
+    last_inference_time = 0
+    snapshot_frame = None  # Raw frame captured when drawing mode started
+    preview_version = None  # Polygon version last drawn onto the snapshot preview
     
     # Initialize Picamera2
+    # RGB888 is laid out as B, G, R in memory, which is what YOLO and OpenCV
+    # expect, so captured frames are used as-is without any conversion.
+    # The lores stream is downscaled by the ISP; its Y plane is a free grayscale image
     picam2 = Picamera2()
     config = picam2.create_preview_configuration(
-        main={"format": "RGB888", "size": (FRAME_WIDTH, FRAME_HEIGHT)}
+        main={"format": "RGB888", "size": (FRAME_WIDTH, FRAME_HEIGHT)},
+        lores={"format": "YUV420", "size": LORES_SIZE}
     )
     picam2.configure(config)
+    frame_duration = int(1_000_000 / CAMERA_FPS)  # Microseconds
+    picam2.set_controls({"FrameDurationLimits": (frame_duration, frame_duration)})
     picam2.start()
 
     print("Detection loop started...")
@@ -127,122 +306,128 @@ def detection_loop():
     try:
         while True:
             # Check if we're in drawing mode - capture snapshot and pause
-            with drawing_lock:
-                is_drawing = drawing_mode
-            
-            if is_drawing:
-                # Capture snapshot frame when drawing starts
+            if drawing_mode:
                 try:
-                    frame = picam2.capture_array()
-                    if frame is not None:
-                        # Convert RGB to BGR for OpenCV (picamera2 returns RGB)
-                        if len(frame.shape) == 3 and frame.shape[2] >= 3:
-                            frame = cv2.cvtColor(frame[:, :, :3], cv2.COLOR_RGB2BGR)
-                    else:
-                        time.sleep(0.1)
-                        continue
-                    
-                    with snapshot_lock:
-                        snapshot_frame = frame.copy()
-                    
-                    # Draw polygon on snapshot if exists
-                    with polygon_lock:
-                        poly_points = polygon_points.copy()
+                    # Capture snapshot frame once when drawing starts
+                    if snapshot_frame is None:
+                        frame = picam2.capture_array()
+                        if frame is None:
+                            time.sleep(0.1)
+                            continue
+                        
+                        snapshot_frame = frame
+                        preview_version = None
+                        snapshot_jpeg = encode_jpeg(snapshot_frame, SNAPSHOT_JPEG_QUALITY)
                     
-                    if len(poly_points) > 0:
-                        pts = np.array(poly_points, np.int32)
-                        cv2.polylines(frame, [pts], True, (0, 255, 0), 2)
-                        # Note: fillPoly with alpha doesn't work directly, use overlay
-                        overlay = frame.copy()
-                        cv2.fillPoly(overlay, [pts], (0, 255, 0))
-                        cv2.addWeighted(overlay, 0.3, frame, 0.7, 0, frame)
+                    # Publish the snapshot with the polygon drawn on it, only
+                    # again if the polygon changes; the stream keeps serving it
+                    version, _, pts, bbox = polygon_state
                     
-                    # Put snapshot in queue
-                    if not frame_queue.full():
-                        try:
-                            frame_queue.put_nowait(frame)
-                        except queue.Full:
-                            pass
+                    if preview_version != version:
+                        preview = snapshot_frame.copy()
+                        if bbox is not None:
+                            draw_polygon_overlay(preview, pts, version)
+                        publish_frame(preview)
+                        preview_version = version
                     
-                    time.sleep(0.1)  # Slower update during drawing
+                    time.sleep(0.2)  # Snapshot is static, just poll for polygon changes
                     continue
                 except Exception as e:
                     print(f"Error capturing snapshot: {e}")
                     time.sleep(0.1)
                     continue
             
+            snapshot_frame = None
+            
             try:
-                frame = picam2.capture_array()
-                if frame is None:
-                    time.sleep(0.03)
-                    continue
-                
-                # Convert RGB to BGR for OpenCV (picamera2 returns RGB)
-                if len(frame.shape) == 3 and frame.shape[2] >= 3:
-                    frame = cv2.cvtColor(frame[:, :, :3], cv2.COLOR_RGB2BGR)
+                # Grab both streams from the same sensor readout
+                cam_request = picam2.capture_request()
+                try:
+                    frame = cam_request.make_array("main")
+                    lores = cam_request.make_array("lores")
+                finally:
+                    cam_request.release()
+                # The first LORES_SIZE[1] rows of a YUV420 buffer are the Y plane
+                luma = lores[:LORES_SIZE[1], :LORES_SIZE[0]]
             except Exception as e:
                 print(f"Error capturing frame: {e}")
                 time.sleep(0.03)
                 continue
 
-            # Run YOLO detection
-            results = model(frame, conf=CONFIDENCE_THRESHOLD, verbose=False)
-            detections = results[0].boxes
-            annotated = results[0].plot()
+            # Skip inference and reuse the previous detections if nothing moved
+            gray_small = cv2.resize(luma, MOTION_SIZE, interpolation=cv2.INTER_AREA)
+            moved = (prev_gray_small is None or
+                     np.count_nonzero(cv2.absdiff(gray_small, prev_gray_small) > MOTION_PIXEL_DELTA)
+                     >= MOTION_MIN_PIXELS)
+            prev_gray_small = gray_small
+            
+            now = time.time()
+            if moved or prev_boxes is None or now - last_inference_time > MAX_INFERENCE_INTERVAL:
+                # Run YOLO detection
+                if GRAYSCALE_INFERENCE:
+                    source = cv2.cvtColor(luma, cv2.COLOR_GRAY2BGR)
+                else:
+                    source = frame
+                results = model(source, imgsz=INFERENCE_SIZE, conf=CONFIDENCE_THRESHOLD, verbose=False)
+                # Single transfer of all box data per frame: x1, y1, x2, y2, conf, cls
+                prev_boxes = results[0].boxes.data.cpu().numpy()
+                if GRAYSCALE_INFERENCE:
+                    # Map boxes from lores to main stream coordinates
+                    prev_boxes[:, [0, 2]] *= FRAME_WIDTH / LORES_SIZE[0]
+                    prev_boxes[:, [1, 3]] *= FRAME_HEIGHT / LORES_SIZE[1]
+                last_inference_time = now
+            boxes = prev_boxes
+            xyxy, conf, cls = boxes[:, :4], boxes[:, 4], boxes[:, 5]
+            
+            # Draw straight onto the captured frame instead of results[0].plot()
+            annotated = frame
+            draw_detections(annotated, xyxy, conf, cls, model.names)
 
             # Get polygon for filtering
-            with polygon_lock:
-                poly_points = polygon_points.copy()
+            version, _, pts, bbox = polygon_state
             
             # Filter detections within polygon
-            valid_detections = []
-            if len(poly_points) > 0:
+            if bbox is None:
+                # No polygon set (the default), allow all detections
+                num_valid = len(xyxy)
+            else:
                 # Draw polygon on annotated frame
-                pts = np.array(poly_points, np.int32)
-                cv2.polylines(annotated, [pts], True, (0, 255, 0), 2)
-                # Draw semi-transparent fill
-                overlay = annotated.copy()
-                cv2.fillPoly(overlay, [pts], (0, 255, 0))
-                cv2.addWeighted(overlay, 0.3, annotated, 0.7, 0, annotated)
+                draw_polygon_overlay(annotated, pts, version)
                 
-                # Check each detection center point
-                for box in detections:
-                    # Get center point of bounding box
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    center_x = int((x1 + x2) / 2)
-                    center_y = int((y1 + y2) / 2)
-                    
-                    if point_in_polygon((center_x, center_y), poly_points):
-                        valid_detections.append(box)
-            else:
-                # No polygon defined, allow all detections
-                valid_detections = list(detections)
+                # Check all detection center points in one pass
+                centers = np.empty((len(xyxy), 2), np.float32)
+                centers[:, 0] = (xyxy[:, 0] + xyxy[:, 2]) * 0.5
+                centers[:, 1] = (xyxy[:, 1] + xyxy[:, 3]) * 0.5
+                
+                # Only ray-cast centers that fall within the polygon's bounding box
+                x_min, y_min, x_max, y_max = bbox
+                cx, cy = centers[:, 0], centers[:, 1]
+                centers = centers[(cx >= x_min) & (cx <= x_max) & (cy >= y_min) & (cy <= y_max)]
+                
+                num_valid = int(np.count_nonzero(pip_batch(centers, pts))) if len(centers) else 0
 
-            # Update detection status
-            detected = len(valid_detections) > 0
-            with status_lock:
-                detection_status["detected"] = detected
-                if detected:
-                    detection_status["count"] += 1
+            detected = num_valid > 0
+            last_trigger = detection_status["last_trigger"]
 
             # Relay Logic
             if detected:
                 now = time.time()
                 if now - last_trigger_time > COOLDOWN:
                     print("CAT DETECTED! Triggering relay")
-                    pulse_relay()
+                    relay_event.set()
                     last_trigger_time = now
-                    with status_lock:
-                        detection_status["last_trigger"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    last_trigger = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-            # Put frame in queue (non-blocking, drop old frames)
-            if not frame_queue.full():
-                try:
-                    frame_queue.put_nowait(annotated)
-                except queue.Full:
-                    pass
+            # Update detection status
+            if detected or detection_status["detected"]:
+                publish_status({
+                    "detected": detected,
+                    "last_trigger": last_trigger,
+                    "count": detection_status["count"] + int(detected)
+                })
 
-            time.sleep(0.03)  # ~30 FPS
+            # Hand frame to the encoder, replacing any frame it hasn't picked up yet
+            publish_frame(annotated)
 
     except Exception as e:
         print(f"Error in detection loop: {e}")
@@ -255,26 +440,93 @@ def detection_loop():
         print("Camera released")
 
 
-def generate_frames():
-    """Generator function for video streaming"""
+def publish_status(status):
+    """Make status the current detection status, serialized once for all clients"""
+    global detection_status, status_payload
+    if orjson is not None:
+        body = orjson.dumps(status)
+    else:
+        body = json.dumps(status).encode('utf-8')
+    etag = f"{zlib.crc32(body):08x}"
+    detection_status = status
+    status_payload = (etag, body)
+    signal_viewers("status")
+
+
+def publish_frame(frame):
+    """Make frame the latest frame for the encoder
+
+    The frame is shared, not copied, so the caller must not modify it afterwards.
+    """
+    global latest_frame
+    with frame_cond:
+        latest_frame = frame
+        frame_cond.notify()
+
+
+def encoder_loop():
+    """Encode the newest annotated frame to JPEG in a background thread"""
+    global latest_frame, latest_jpeg, latest_part
     while True:
         try:
-            # Get frame from queue (blocking with timeout)
-            frame = frame_queue.get(timeout=1.0)
+            with frame_cond:
+                if not frame_cond.wait_for(lambda: latest_frame is not None, timeout=1.0):
+                    continue
+                frame, latest_frame = latest_frame, None
             
-            # Encode frame as JPEG
-            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            if not ret:
+            if frame.shape[1::-1] != STREAM_SIZE:
+                frame = cv2.resize(frame, STREAM_SIZE, interpolation=cv2.INTER_AREA)
+            frame_bytes = encode_jpeg(frame, STREAM_JPEG_QUALITY)
+            if frame_bytes is None:
                 continue
             
-            frame_bytes = buffer.tobytes()
+            # Built once per frame so MJPEG viewers share the same bytes object
+            latest_part = (b'--frame\r\n'
+                           b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+            latest_jpeg = frame_bytes
+            signal_viewers("frame")
+        except Exception as e:
+            print(f"Error encoding frame: {e}")
+
+
+def signal_viewers(kind):
+    """Wake stream greenlets waiting for new "frame" or "status" data; safe from any thread
+
+    Viewers are greenlets on the server hub, so a native thread must not set their
+    event directly; the swap is handed to the hub's loop instead.
+    """
+    if server_hub is not None:
+        server_hub.loop.run_callback_threadsafe(_release_viewers, kind)
+
+
+def _release_viewers(kind):
+    """Runs on the server hub: release current waiters and arm a fresh signal"""
+    event = viewer_signals[kind]
+    viewer_signals[kind] = GreenEvent()
+    event.set()
+
+
+def wait_for_new(read, last_sent, kind):
+    """Wait until read() returns something other than None or last_sent and return it"""
+    while True:
+        # Take the signal before reading, so a publish in between still wakes us
+        signal = viewer_signals[kind]
+        value = read()
+        if value is not None and value is not last_sent:
+            return value
+        signal.wait()
+
+
+def generate_frames():
+    """Generator function for video streaming"""
+    last_sent = None
+    while True:
+        try:
+            part = wait_for_new(lambda: latest_part, last_sent, "frame")
             
             # Yield frame in multipart format
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        except queue.Empty:
-            # Send a placeholder frame if queue is empty
-            continue
+            yield part
+            last_sent = part
         except Exception as e:
             print(f"Error generating frame: {e}")
             break
@@ -283,12 +535,9 @@ def generate_frames():
 @app.route('/get_snapshot')
 def get_snapshot():
     """Get current frame snapshot for polygon drawing"""
-    with snapshot_lock:
-        if snapshot_frame is not None:
-            ret, buffer = cv2.imencode('.jpg', snapshot_frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
-            if ret:
-                frame_bytes = buffer.tobytes()
-                return Response(frame_bytes, mimetype='image/jpeg')
+    frame_bytes = snapshot_jpeg
+    if frame_bytes is not None:
+        return Response(frame_bytes, mimetype='image/jpeg')
     return Response(status=404)
 
 
@@ -296,8 +545,7 @@ def get_snapshot():
 def start_drawing():
     """Start drawing mode - pause video stream"""
     global drawing_mode
-    with drawing_lock:
-        drawing_mode = True
+    drawing_mode = True
     return jsonify({"status": "drawing_started"})
 
 
@@ -305,21 +553,18 @@ def start_drawing():
 def stop_drawing():
     """Stop drawing mode - resume video stream"""
     global drawing_mode
-    with drawing_lock:
-        drawing_mode = False
+    drawing_mode = False
     return jsonify({"status": "drawing_stopped"})
 
 
 @app.route('/save_polygon', methods=['POST'])
 def save_polygon_endpoint():
     """Save polygon coordinates from client"""
-    global polygon_points
     try:
         data = request.get_json()
         points = data.get('points', [])
         
-        with polygon_lock:
-            polygon_points = points
+        set_polygon(points)
         
         if save_polygon():
             return jsonify({"status": "success", "message": f"Polygon saved with {len(points)} points"})
@@ -332,17 +577,13 @@ def save_polygon_endpoint():
 @app.route('/load_polygon', methods=['GET'])
 def load_polygon_endpoint():
     """Load polygon coordinates"""
-    with polygon_lock:
-        points = polygon_points.copy()
-    return jsonify({"points": points})
+    return jsonify({"points": polygon_state[1]})
 
 
 @app.route('/remove_polygon', methods=['POST'])
 def remove_polygon():
     """Remove polygon"""
-    global polygon_points
-    with polygon_lock:
-        polygon_points = []
+    set_polygon([])
     
     # Delete save file if exists
     if os.path.exists(POLYGON_SAVE_FILE):
@@ -354,535 +595,41 @@ def remove_polygon():
     return jsonify({"status": "success", "message": "Polygon removed"})
 
 
+# Main page is a static file; it is read, gzipped and tagged once at import
+with open(os.path.join(STATIC_DIR, "index.html"), "rb") as f:
+    INDEX_PAGE = f.read()
+INDEX_PAGE_GZ = gzip.compress(INDEX_PAGE, 9)
+INDEX_ETAG = f"{zlib.crc32(INDEX_PAGE):08x}"
+INDEX_ETAG_GZ = f"{zlib.crc32(INDEX_PAGE):08x}-gz"
+
+
 @app.route('/')
 def index():
     """Main page with video stream"""
-    html_template = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Cat Detection System</title>
-        <meta charset="utf-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1">
-        <style>
-            body {
-                font-family: Arial, sans-serif;
-                margin: 0;
-                padding: 20px;
-                background-color: #1a1a1a;
-                color: #ffffff;
-            }
-            .container {
-                max-width: 1200px;
-                margin: 0 auto;
-            }
-            h1 {
-                text-align: center;
-                color: #4CAF50;
-            }
-            .status-panel {
-                background-color: #2a2a2a;
-                padding: 20px;
-                border-radius: 10px;
-                margin-bottom: 20px;
-                display: flex;
-                justify-content: space-around;
-                flex-wrap: wrap;
-            }
-            .status-item {
-                text-align: center;
-                padding: 10px;
-            }
-            .status-label {
-                font-size: 14px;
-                color: #888;
-                margin-bottom: 5px;
-            }
-            .status-value {
-                font-size: 24px;
-                font-weight: bold;
-            }
-            .detected {
-                color: #ff4444;
-            }
-            .not-detected {
-                color: #4CAF50;
-            }
-            .video-container {
-                background-color: #000;
-                border-radius: 10px;
-                overflow: hidden;
-                text-align: center;
-                padding: 10px;
-                position: relative;
-                display: inline-block;
-                width: 100%;
-            }
-            .video-wrapper {
-                position: relative;
-                display: inline-block;
-                max-width: 100%;
-                width: 100%;
-            }
-            #videoStream {
-                max-width: 100%;
-                height: auto;
-                border-radius: 5px;
-                display: block;
-            }
-            #drawingCanvas {
-                position: absolute;
-                top: 0;
-                left: 0;
-                border-radius: 5px;
-                cursor: crosshair;
-                display: none;
-                pointer-events: auto;
-                z-index: 10;
-            }
-            .drawing-mode #videoStream {
-                cursor: crosshair;
-            }
-            .controls {
-                text-align: center;
-                margin: 20px 0;
-            }
-            .btn {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                padding: 12px 24px;
-                margin: 5px;
-                border-radius: 5px;
-                cursor: pointer;
-                font-size: 16px;
-                font-weight: bold;
-                transition: background-color 0.3s;
-            }
-            .btn:hover {
-                background-color: #45a049;
-            }
-            .btn:active {
-                background-color: #3d8b40;
-            }
-            .btn-danger {
-                background-color: #f44336;
-            }
-            .btn-danger:hover {
-                background-color: #da190b;
-            }
-            .btn:disabled {
-                background-color: #666;
-                cursor: not-allowed;
-            }
-            .drawing-mode {
-                border: 3px solid #ff9800;
-            }
-            .info {
-                text-align: center;
-                margin-top: 20px;
-                color: #888;
-                font-size: 12px;
-            }
-            .instruction {
-                background-color: #2a2a2a;
-                padding: 15px;
-                border-radius: 10px;
-                margin-bottom: 20px;
-                color: #ccc;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>🐱 Cat Detection System</h1>
-            
-            <div class="status-panel">
-                <div class="status-item">
-                    <div class="status-label">Detection Status</div>
-                    <div class="status-value" id="status">Checking...</div>
-                </div>
-                <div class="status-item">
-                    <div class="status-label">Total Detections</div>
-                    <div class="status-value" id="count">0</div>
-                </div>
-                <div class="status-item">
-                    <div class="status-label">Last Trigger</div>
-                    <div class="status-value" id="lastTrigger" style="font-size: 16px;">Never</div>
-                </div>
-            </div>
-            
-            <div class="instruction" id="instruction">
-                <strong>Area of Interest:</strong> Click "Draw Polygon" to select the detection area. Only cats detected within this area will trigger the relay.
-            </div>
-            
-            <div class="controls">
-                <button class="btn" id="drawBtn" onclick="startDrawing()">Draw Polygon</button>
-                <button class="btn btn-danger" id="removeBtn" onclick="removePolygon()">Remove Polygon</button>
-                <button class="btn" id="finishBtn" onclick="finishDrawing()" style="display:none;">Finish Drawing</button>
-            </div>
-            
-            <div class="video-container" id="videoContainer">
-                <div class="video-wrapper">
-                    <img id="videoStream" src="{{ url_for('video_feed') }}" alt="Video Stream">
-                    <canvas id="drawingCanvas"></canvas>
-                </div>
-            </div>
-            
-            <div class="info">
-                <p id="infoText">Streaming live detection feed</p>
-            </div>
-        </div>
-        
-        <script>
-            let isDrawing = false;
-            let polygonPoints = [];
-            let canvas, ctx, img, imgWidth, imgHeight;
-            let originalImgSrc = null;
-            
-            // Initialize
-            window.onload = function() {
-                canvas = document.getElementById('drawingCanvas');
-                ctx = canvas.getContext('2d');
-                img = document.getElementById('videoStream');
-                
-                if (!img) {
-                    console.error('Image element not found!');
-                    return;
-                }
-                
-                // Update canvas size when image loads
-                img.onload = function() {
-                    updateCanvasSize();
-                    // Draw polygon if exists and not in drawing mode
-                    if (!isDrawing && polygonPoints.length > 0) {
-                        drawPolygon();
-                        canvas.style.display = 'block';
-                    }
-                };
-                
-                // Attach click handler to image
-                attachImageClickHandler();
-                
-                // Load saved polygon on page load
-                loadPolygon();
-                
-                // Update status every second
-                setInterval(updateStatus, 1000);
-            };
-            
-            function updateCanvasSize() {
-                // Get the image's actual displayed size
-                const imgRect = img.getBoundingClientRect();
-                const wrapper = img.parentElement;
-                
-                // Set canvas internal resolution to match displayed size
-                canvas.width = imgRect.width;
-                canvas.height = imgRect.height;
-                
-                // Set canvas CSS size to match image
-                canvas.style.width = imgRect.width + 'px';
-                canvas.style.height = imgRect.height + 'px';
-                
-                // Position canvas to exactly overlay the image (relative to wrapper)
-                canvas.style.position = 'absolute';
-                canvas.style.top = '0px';
-                canvas.style.left = '0px';
-                
-                console.log('Canvas updated:', {
-                    canvasSize: canvas.width + 'x' + canvas.height,
-                    imgSize: imgRect.width + 'x' + imgRect.height,
-                    imgNatural: img.naturalWidth + 'x' + img.naturalHeight
-                });
-                
-                // Redraw polygon if exists
-                if (polygonPoints.length > 0) {
-                    drawPolygon();
-                }
-            }
-            
-            function startDrawing() {
-                if (isDrawing) return;
-                
-                isDrawing = true;
-                polygonPoints = [];
-                
-                // Pause video stream
-                originalImgSrc = img.src;
-                fetch('/start_drawing', { method: 'POST' })
-                    .then(() => {
-                        // Wait a moment for snapshot, then load it
-                        setTimeout(() => {
-                            if (!img) {
-                                console.error('img is undefined!');
-                                return;
-                            }
-                            
-                            img.src = '/get_snapshot?' + new Date().getTime();
-                            img.onload = function() {
-                                // Re-attach click handler after image loads
-                                attachImageClickHandler();
-                                
-                                // Wait a bit for image to fully render
-                                setTimeout(() => {
-                                    updateCanvasSize();
-                                    canvas.style.display = 'block';
-                                    canvas.style.pointerEvents = 'none'; // Let clicks pass through to image
-                                    document.getElementById('videoContainer').classList.add('drawing-mode');
-                                    document.getElementById('drawBtn').disabled = true;
-                                    document.getElementById('finishBtn').style.display = 'inline-block';
-                                    document.getElementById('instruction').textContent = 'Click on the image to add points. Click "Finish Drawing" when done.';
-                                    console.log('Drawing mode activated. Canvas size:', canvas.width, 'x', canvas.height);
-                                    console.log('Image natural size:', img.naturalWidth, 'x', img.naturalHeight);
-                                    console.log('Image display size:', img.width, 'x', img.height);
-                                    console.log('Ready to receive clicks!');
-                                }, 200);
-                            };
-                        }, 500);
-                    });
-            }
-            
-            function finishDrawing() {
-                console.log('Finish drawing clicked. Current points:', polygonPoints.length);
-                console.log('Points array:', polygonPoints);
-                
-                if (!isDrawing) {
-                    alert('Not in drawing mode');
-                    return;
-                }
-                
-                if (polygonPoints.length < 3) {
-                    alert('Please draw at least 3 points to form a polygon. Currently have: ' + polygonPoints.length + ' points.');
-                    return;
-                }
-                
-                // Save polygon
-                fetch('/save_polygon', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ points: polygonPoints })
-                })
-                .then(response => response.json())
-                .then(data => {
-                    console.log(data.message);
-                    // Resume video stream
-                    fetch('/stop_drawing', { method: 'POST' })
-                        .then(() => {
-                            img.src = originalImgSrc || '{{ url_for("video_feed") }}';
-                            // Keep canvas visible to show polygon on live stream
-                            document.getElementById('videoContainer').classList.remove('drawing-mode');
-                            document.getElementById('drawBtn').disabled = false;
-                            document.getElementById('finishBtn').style.display = 'none';
-                            document.getElementById('instruction').textContent = 'Area of Interest: Click "Draw Polygon" to select the detection area. Only cats detected within this area will trigger the relay.';
-                            isDrawing = false;
-                        });
-                });
-            }
-            
-            function removePolygon() {
-                if (confirm('Are you sure you want to remove the polygon? Detection will work on the entire frame.')) {
-                    fetch('/remove_polygon', { method: 'POST' })
-                        .then(response => response.json())
-                        .then(data => {
-                            polygonPoints = [];
-                            ctx.clearRect(0, 0, canvas.width, canvas.height);
-                            canvas.style.display = 'none';
-                            alert(data.message);
-                        });
-                }
-            }
-            
-            function loadPolygon() {
-                fetch('/load_polygon')
-                    .then(response => response.json())
-                    .then(data => {
-                        if (data.points && data.points.length > 0) {
-                            polygonPoints = data.points;
-                            // Wait for image to load before drawing
-                            if (img.complete) {
-                                updateCanvasSize();
-                                drawPolygon();
-                                canvas.style.display = 'block';
-                            }
-                        }
-                    });
-            }
-            
-            // Function to attach click handler to image
-            function attachImageClickHandler() {
-                if (!img) {
-                    console.error('Cannot attach click handler: img is undefined');
-                    return;
-                }
-                
-                // Remove any existing handler first
-                img.removeEventListener('click', handleImageClick);
-                
-                // Add click handler
-                img.addEventListener('click', handleImageClick);
-                console.log('Image click handler attached');
-            }
-            
-            // Primary click handler on the image
-            function handleImageClick(e) {
-                if (!isDrawing) {
-                    console.log('Not in drawing mode, ignoring click');
-                    return;
-                }
-                
-                e.preventDefault();
-                e.stopPropagation();
-                
-                if (!img) {
-                    console.error('img is undefined in click handler');
-                    return;
-                }
-                
-                // Get click position relative to image
-                const imgRect = img.getBoundingClientRect();
-                const x = e.clientX - imgRect.left;
-                const y = e.clientY - imgRect.top;
-                
-                // Check if click is within image bounds
-                if (x < 0 || x > imgRect.width || y < 0 || y > imgRect.height) {
-                    console.log('Click outside image bounds:', x, y, 'vs', imgRect.width, imgRect.height);
-                    return;
-                }
-                
-                // Scale to actual frame dimensions (640x480)
-                if (img.naturalWidth === 0 || img.naturalHeight === 0) {
-                    console.error('Image natural dimensions are 0!');
-                    return;
-                }
-                
-                const scaleX = img.naturalWidth / imgRect.width;
-                const scaleY = img.naturalHeight / imgRect.height;
-                const scaledX = Math.round(x * scaleX);
-                const scaledY = Math.round(y * scaleY);
-                
-                // Add point
-                polygonPoints.push([scaledX, scaledY]);
-                console.log('✅ Point added!', {
-                    clickPos: [Math.round(x), Math.round(y)],
-                    scaledPos: [scaledX, scaledY],
-                    totalPoints: polygonPoints.length,
-                    imgNatural: img.naturalWidth + 'x' + img.naturalHeight,
-                    imgDisplay: imgRect.width + 'x' + imgRect.height
-                });
-                
-                // Update UI
-                const instructionEl = document.getElementById('instruction');
-                if (instructionEl) {
-                    instructionEl.textContent = 
-                        `Points added: ${polygonPoints.length}. Click to add more points, then click "Finish Drawing".`;
-                }
-                
-                // Redraw polygon
-                drawPolygon();
-            }
-            
-            // Canvas click handler (backup, but image handler should work)
-            if (canvas) {
-                canvas.addEventListener('click', function(e) {
-                    if (!isDrawing) return;
-                    // Let the image handler deal with it
-                    e.stopPropagation();
-                });
-            }
-            
-            function drawPolygon() {
-                if (polygonPoints.length === 0) {
-                    ctx.clearRect(0, 0, canvas.width, canvas.height);
-                    return;
-                }
-                
-                // Clear canvas
-                ctx.clearRect(0, 0, canvas.width, canvas.height);
-                
-                // Scale points from frame dimensions to canvas display size
-                const scaleX = canvas.width / img.naturalWidth;
-                const scaleY = canvas.height / img.naturalHeight;
-                
-                // Draw filled polygon
-                if (polygonPoints.length > 2) {
-                    ctx.beginPath();
-                    const firstPoint = polygonPoints[0];
-                    ctx.moveTo(firstPoint[0] * scaleX, firstPoint[1] * scaleY);
-                    
-                    for (let i = 1; i < polygonPoints.length; i++) {
-                        ctx.lineTo(polygonPoints[i][0] * scaleX, polygonPoints[i][1] * scaleY);
-                    }
-                    ctx.closePath();
-                    
-                    // Fill
-                    ctx.fillStyle = 'rgba(0, 255, 0, 0.2)';
-                    ctx.fill();
-                    
-                    // Stroke
-                    ctx.strokeStyle = '#00ff00';
-                    ctx.lineWidth = 2;
-                    ctx.stroke();
-                }
-                
-                // Draw points as circles
-                ctx.fillStyle = '#00ff00';
-                ctx.strokeStyle = '#ffffff';
-                ctx.lineWidth = 2;
-                for (let i = 0; i < polygonPoints.length; i++) {
-                    const point = polygonPoints[i];
-                    const x = point[0] * scaleX;
-                    const y = point[1] * scaleY;
-                    
-                    ctx.beginPath();
-                    ctx.arc(x, y, 6, 0, 2 * Math.PI);
-                    ctx.fill();
-                    ctx.stroke();
-                    
-                    // Draw point number
-                    ctx.fillStyle = '#000000';
-                    ctx.font = '12px Arial';
-                    ctx.textAlign = 'center';
-                    ctx.textBaseline = 'middle';
-                    ctx.fillText((i + 1).toString(), x, y);
-                    ctx.fillStyle = '#00ff00';
-                }
-                
-                console.log('Polygon drawn with', polygonPoints.length, 'points');
-            }
-            
-            function updateStatus() {
-                fetch('/status')
-                    .then(response => response.json())
-                    .then(data => {
-                        const statusEl = document.getElementById('status');
-                        const countEl = document.getElementById('count');
-                        const lastTriggerEl = document.getElementById('lastTrigger');
-                        
-                        if (data.detected) {
-                            statusEl.textContent = 'CAT DETECTED!';
-                            statusEl.className = 'status-value detected';
-                        } else {
-                            statusEl.textContent = 'No Cat';
-                            statusEl.className = 'status-value not-detected';
-                        }
-                        
-                        countEl.textContent = data.count;
-                        lastTriggerEl.textContent = data.last_trigger || 'Never';
-                    })
-                    .catch(error => console.error('Error:', error));
-            }
-            
-            // Update canvas on window resize
-            window.addEventListener('resize', function() {
-                if (isDrawing || polygonPoints.length > 0) {
-                    updateCanvasSize();
-                }
-            });
-        </script>
-    </body>
-    </html>
-    """
-    return render_template_string(html_template)
+    if request.accept_encodings['gzip'] > 0:  # Respects q=0, unlike 'in'
+        response = Response(INDEX_PAGE_GZ, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(INDEX_ETAG_GZ)
+    else:
+        response = Response(INDEX_PAGE, mimetype='text/html')
+        response.set_etag(INDEX_ETAG)
+    response.headers['Cache-Control'] = INDEX_CACHE_CONTROL
+    response.headers['Vary'] = 'Accept-Encoding'
+    # Turns revalidations of the unchanged page into an empty 304
+    return response.make_conditional(request)
+
+
+@sock.route('/ws/video')
+def ws_video(ws):
+    """WebSocket video stream, one binary JPEG message per new frame"""
+    # Polygon points are in camera frame coordinates, which may differ from STREAM_SIZE
+    ws.send(json.dumps({"frame_width": FRAME_WIDTH, "frame_height": FRAME_HEIGHT}))
+    last_sent = None
+    while True:
+        frame_bytes = wait_for_new(lambda: latest_jpeg, last_sent, "frame")
+        # Blocks while the client is behind, so slow clients just skip frames
+        ws.send(frame_bytes)
+        last_sent = frame_bytes
 
 
 @app.route('/video_feed')
@@ -892,34 +639,64 @@ def video_feed():
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
 
+def event_stream():
+    """Generator pushing detection status to the client whenever it changes"""
+    last_sent = None
+    while True:
+        signal = viewer_signals["status"]
+        payload = status_payload
+        if payload is not last_sent:
+            yield b"data: " + payload[1] + b"\n\n"
+            last_sent = payload
+        elif not signal.wait(timeout=EVENTS_KEEPALIVE):
+            # Comment line keeps idle connections open through proxies
+            yield b": ping\n\n"
+
+
+@app.route('/events')
+def events():
+    """Server-Sent Events stream of detection status"""
+    return Response(event_stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+
 @app.route('/status')
 def status():
     """API endpoint for detection status"""
-    with status_lock:
-        return {
-            "detected": detection_status["detected"],
-            "count": detection_status["count"],
-            "last_trigger": detection_status["last_trigger"]
-        }
+    etag, body = status_payload
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # no-cache rather than no-store: caches must revalidate, which keeps the 304 path
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 
 if __name__ == '__main__':
     # Initialize GPIO
     try:
         GPIO.setmode(GPIO.BCM)
-        GPIO.setup(RELAY_PIN, GPIO.OUT)
-        GPIO.output(RELAY_PIN, GPIO.HIGH)  # Start with relay OFF
+        GPIO.setup(RELAY_PIN, GPIO.OUT, initial=GPIO.HIGH)  # Start with relay OFF
+        atexit.register(cleanup_gpio)
         print("GPIO initialized successfully")
     except Exception as e:
         print(f"Warning: GPIO initialization failed: {e}")
     
     # Load saved polygon on startup
     load_polygon()
+    publish_status(detection_status)
     
     # Start detection thread
     detection_thread = threading.Thread(target=detection_loop, daemon=True)
     detection_thread.start()
     
+    # Start relay thread
+    relay_thread = threading.Thread(target=relay_loop, daemon=True)
+    relay_thread.start()
+    
+    # Start JPEG encoder thread
+    encoder_thread = threading.Thread(target=encoder_loop, daemon=True)
+    encoder_thread.start()
+    
     # Give detection thread a moment to initialize
     time.sleep(2)
     
@@ -929,9 +706,7 @@ if __name__ == '__main__':
     print("Access the application at: http://<your-ip>:5000")
     print("="*50 + "\n")
     
-    try:
-        app.run(host='0.0.0.0', port=5001, debug=False, threaded=True)
-    finally:
-        GPIO.cleanup()
-        print("GPIO cleaned up")
+    # Each request and stream is a greenlet rather than an OS thread
+    server_hub = gevent.get_hub()
+    WSGIServer(('0.0.0.0', 5001), app).serve_forever()
 
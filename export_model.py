@@ -0,0 +1,137 @@
+"""
+Export the cat detection model to an INT8 inference engine
+Run once on the deployment device:
+    python export_model.py capture        # grab calibration frames from the Pi camera
+    python export_model.py engine         # TensorRT INT8 engine (Jetson / NVIDIA GPU)
+    python export_model.py onnx           # ONNX Runtime INT8 model (Raspberry Pi CPU)
+app.py picks up the exported model automatically.
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+SOURCE_MODEL = "best.pt"
+CALIB_DATA = "calib.yaml"
+CALIB_DIR = "calib_images"
+CALIB_FRAMES = 300
+IMGSZ = 320  # Must match INFERENCE_SIZE in app.py
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+ENGINE_PATH = "best.engine"
+ONNX_INT8_PATH = "best_int8.onnx"
+
+
+def capture_calibration_frames(count, interval):
+    """Capture representative frames from the Pi camera for INT8 calibration"""
+    from picamera2 import Picamera2
+
+    os.makedirs(CALIB_DIR, exist_ok=True)
+    picam2 = Picamera2()
+    config = picam2.create_preview_configuration(
+        main={"format": "RGB888", "size": (FRAME_WIDTH, FRAME_HEIGHT)}
+    )
+    picam2.configure(config)
+    picam2.start()
+
+    try:
+        for i in range(count):
+            frame = picam2.capture_array()
+            cv2.imwrite(os.path.join(CALIB_DIR, f"frame_{i:04d}.jpg"), frame)
+            if (i + 1) % 50 == 0:
+                print(f"Captured {i + 1}/{count} frames")
+            time.sleep(interval)
+    finally:
+        picam2.stop()
+        picam2.close()
+    print(f"Saved {count} calibration frames to {CALIB_DIR}/")
+
+
+def export_copy(tmp_dir, **kwargs):
+    """Export a copy of the source model inside tmp_dir
+
+    Ultralytics writes exports (and intermediates like best.onnx) next to the
+    checkpoint, which would overwrite the tracked best.onnx.
+    """
+    return YOLO(shutil.copy(SOURCE_MODEL, tmp_dir)).export(**kwargs)
+
+
+def export_engine():
+    """Export a TensorRT INT8 engine calibrated on the captured frames"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = export_copy(tmp_dir, format="engine", int8=True, data=CALIB_DATA,
+                           workspace=4, batch=1, imgsz=IMGSZ, device=0)
+        shutil.move(path, ENGINE_PATH)
+    print(f"Exported TensorRT engine: {ENGINE_PATH}")
+
+
+def letterbox(image, size):
+    """Resize and pad an image to a square input the same way Ultralytics does"""
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    padded = np.full((size, size, 3), 114, np.uint8)
+    top = (size - new_h) // 2
+    left = (size - new_w) // 2
+    padded[top:top + new_h, left:left + new_w] = resized
+    return padded
+
+
+def export_onnx_int8():
+    """Export to ONNX and statically quantize it to INT8 for ONNX Runtime"""
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat,
+                                          QuantType, quantize_static)
+
+    images = sorted(glob.glob(os.path.join(CALIB_DIR, "*.jpg")))
+    if not images:
+        raise SystemExit(f"No calibration frames in {CALIB_DIR}/, run 'capture' first")
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self, input_name):
+            self.input_name = input_name
+            self.paths = iter(images)
+
+        def get_next(self):
+            path = next(self.paths, None)
+            if path is None:
+                return None
+            # Ultralytics preprocessing: BGR -> RGB, HWC -> NCHW, 0..1
+            image = letterbox(cv2.imread(path), IMGSZ)[:, :, ::-1]
+            blob = image.transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+            return {self.input_name: np.ascontiguousarray(blob)}
+
+    # The FP32 model is only an intermediate, so it lives and dies in a temp dir
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fp32_path = export_copy(tmp_dir, format="onnx", imgsz=IMGSZ, batch=1, simplify=True)
+        quantize_static(fp32_path, ONNX_INT8_PATH, FrameReader("images"),
+                        quant_format=QuantFormat.QDQ,
+                        activation_type=QuantType.QUInt8,
+                        weight_type=QuantType.QInt8,
+                        per_channel=True)
+    print(f"Exported INT8 ONNX model: {ONNX_INT8_PATH} ({len(images)} calibration frames)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("target", choices=["capture", "engine", "onnx"])
+    parser.add_argument("--frames", type=int, default=CALIB_FRAMES,
+                        help="number of calibration frames to capture")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="seconds between captured frames")
+    args = parser.parse_args()
+
+    if args.target == "capture":
+        capture_calibration_frames(args.frames, args.interval)
+    elif args.target == "engine":
+        export_engine()
+    else:
+        export_onnx_int8()
@@ -0,0 +1,128 @@
+// Draws the polygon overlay on an OffscreenCanvas handed over by the page,
+// keeping overlay repaints off the main thread
+let canvas = null;
+let ctx = null;
+let polygonPoints = [];
+let frameWidth = 0, frameHeight = 0;
+let width = 0, height = 0;
+// Points scaled to the canvas as [x0, y0, x1, y1, ...], plus their bounding box
+let scaled = new Float32Array(0);
+let minX = 0, minY = 0, maxX = 0, maxY = 0;
+let rafPending = false;
+
+self.onmessage = function(e) {
+    const msg = e.data;
+    if (msg.type === 'init') {
+        canvas = msg.canvas;
+        ctx = canvas.getContext('2d');
+    } else if (msg.type === 'polygon') {
+        // Resizing reallocates (and clears) the backing store, so only do it on a real change
+        if (width !== msg.width || height !== msg.height) {
+            width = canvas.width = msg.width;
+            height = canvas.height = msg.height;
+        }
+        polygonPoints = msg.points;
+        frameWidth = msg.frameWidth;
+        frameHeight = msg.frameHeight;
+        recomputeScaled();
+        scheduleDraw();
+    }
+};
+
+// Scale points from frame dimensions to canvas display size; only needed when
+// the points or the canvas size change, not on every draw
+function recomputeScaled() {
+    const scaleX = width / frameWidth;
+    const scaleY = height / frameHeight;
+    scaled = new Float32Array(2 * polygonPoints.length);
+    minX = minY = Infinity;
+    maxX = maxY = -Infinity;
+    for (let i = 0; i < polygonPoints.length; i++) {
+        const x = scaled[2 * i] = polygonPoints[i][0] * scaleX;
+        const y = scaled[2 * i + 1] = polygonPoints[i][1] * scaleY;
+        minX = Math.min(minX, x);
+        maxX = Math.max(maxX, x);
+        minY = Math.min(minY, y);
+        maxY = Math.max(maxY, y);
+    }
+}
+
+// Coalesce redraw requests into at most one draw per display frame
+function scheduleDraw() {
+    if (rafPending) return;
+    rafPending = true;
+    requestAnimationFrame(() => {
+        rafPending = false;
+        drawPolygon();
+    });
+}
+
+// The canvas is its own layer stacked over the video, so it keeps its
+// pixels while frames update underneath; it is only redrawn when the
+// polygon or canvas size changes, never per video frame
+function drawPolygon() {
+    // Clear canvas
+    ctx.clearRect(0, 0, width, height);
+    const count = scaled.length / 2;
+    if (count === 0) {
+        return;
+    }
+
+    const minVisX = -6, maxVisX = width + 6;
+    const minVisY = -6, maxVisY = height + 6;
+
+    // Nothing to paint if the whole polygon is clipped out (e.g. stale points after a resize)
+    if (maxX < minVisX || minX > maxVisX || maxY < minVisY || minY > maxVisY) {
+        return;
+    }
+
+    // Build the outline and vertex paths, skipping dots that fall off the canvas
+    const outlinePath = new Path2D();
+    const dotsPath = new Path2D();
+    for (let i = 0; i < count; i++) {
+        const x = scaled[2 * i];
+        const y = scaled[2 * i + 1];
+        if (i === 0) {
+            outlinePath.moveTo(x, y);
+        } else {
+            outlinePath.lineTo(x, y);
+        }
+        if (x < minVisX || x > maxVisX || y < minVisY || y > maxVisY) continue;
+        dotsPath.moveTo(x + 6, y);
+        dotsPath.arc(x, y, 6, 0, 2 * Math.PI);
+    }
+    outlinePath.closePath();
+
+    // Draw filled polygon
+    if (count > 2) {
+        // Fill
+        ctx.fillStyle = 'rgba(0, 255, 0, 0.2)';
+        ctx.fill(outlinePath);
+
+        // Stroke
+        ctx.strokeStyle = '#00ff00';
+        ctx.lineWidth = 2;
+        ctx.stroke(outlinePath);
+    }
+
+    // Draw points as circles
+    ctx.fillStyle = '#00ff00';
+    ctx.strokeStyle = '#ffffff';
+    ctx.lineWidth = 2;
+    ctx.fill(dotsPath);
+    ctx.stroke(dotsPath);
+
+    // Draw point numbers; text state is set once for all labels
+    ctx.fillStyle = '#000000';
+    ctx.font = '12px Arial';
+    ctx.textAlign = 'center';
+    ctx.textBaseline = 'middle';
+    for (let i = 0; i < count; i++) {
+        const x = scaled[2 * i];
+        const y = scaled[2 * i + 1];
+        if (x < minVisX || x > maxVisX || y < minVisY || y > maxVisY) continue;
+        ctx.fillText((i + 1).toString(), x, y);
+    }
+
+    console.log('Polygon drawn with', count, 'points');
+}